@@ -9,25 +9,37 @@ Usage:
     python julehjerte_cuts.py input.svg output.svg
 
 Dependencies:
-    pip install shapely svgpathtools ortools
+    pip install numpy scipy shapely svgpathtools ortools
+    pip install lxml  # optional, faster SVG output
 """
 
 import argparse
+import os
 import re
 import math
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Set
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+from scipy.spatial import cKDTree
+
+import shapely
 from shapely.geometry import Polygon, MultiPolygon, LineString, LinearRing, Point
 from shapely.ops import polygonize, unary_union
 
-from svgpathtools import parse_path
+from svgpathtools import parse_path, Line, Arc
 
 from ortools.sat.python import cp_model
 
 import xml.etree.ElementTree as ET
 
+try:  # optional: lxml serializes large documents much faster
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
 
 # ---------------------------------------------------------------------------
 # Geometry helpers
@@ -92,22 +104,65 @@ def _rect_to_polygon(x, y, w, h, t):
     return Polygon([_apply_transform(px, py, t) for px, py in corners])
 
 
-def _path_to_polygon(path, samples=16):
-    pts = []
-    for seg in path:
-        for i in range(samples):
-            z = seg.point(i / samples)
-            pts.append((z.real, z.imag))
-    if path:
-        z = path[-1].point(1.0)
-        pts.append((z.real, z.imag))
-    if len(pts) < 3:
-        return None
-    poly = Polygon(pts).buffer(0)
-    if isinstance(poly, Polygon):
-        return poly
-    polys = list(_iter_polygons(poly))
-    return max(polys, key=lambda p: p.area) if polys else None
+def _sample_ring(segs, samples):
+    # Straight segments only need their start point while curves are
+    # sampled; the subpath's last end point closes the ring.
+    counts = [1 if isinstance(seg, Line) else samples for seg in segs]
+    z = np.empty(sum(counts) + 1, dtype=complex)
+    ts = np.arange(samples) / samples
+    k = 0
+    for seg, n in zip(segs, counts):
+        if n == 1:
+            z[k] = seg.start
+        elif isinstance(seg, Arc):
+            z[k:k + n] = [seg.point(t) for t in ts]
+        else:
+            z[k:k + n] = seg.point(ts)
+        k += n
+    z[k] = segs[-1].end
+    return z
+
+
+def _path_to_polygons(path, samples=16):
+    # Drop zero-length lines, then sample each subpath (split wherever a
+    # segment does not start at the previous end, i.e. after Z or M) as its
+    # own ring. Rings are combined even-odd, so holes stay holes.
+    segs = [seg for seg in path if not (isinstance(seg, Line) and seg.start == seg.end)]
+    if not segs:
+        return []
+    cuts = [i + 1 for i in range(len(segs) - 1) if segs[i].end != segs[i + 1].start]
+    geom = None
+    for lo, hi in zip([0] + cuts, cuts + [len(segs)]):
+        z = _sample_ring(segs[lo:hi], samples)
+        if len(z) < 3:
+            continue
+        ring = shapely.make_valid(Polygon(np.column_stack([z.real, z.imag])))
+        geom = ring if geom is None else geom.symmetric_difference(ring)
+    if geom is None:
+        return []
+    return [p for p in _iter_polygons(geom) if p.area > 0]
+
+
+def _snap_vertices(points, tol):
+    """
+    Merge points closer than tol. Returns (ids, vertices): ids[i] is the vertex
+    index of points[i], and each vertex is the first point that claimed it.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    ids = np.full(len(pts), -1, dtype=np.int64)
+    vertices: List[Tuple[float, float]] = []
+    if len(pts) == 0:
+        return ids, vertices
+    neighbours = cKDTree(pts).query_ball_point(pts, tol)
+    for i, near in enumerate(neighbours):
+        if ids[i] >= 0:
+            continue
+        vid = len(vertices)
+        vertices.append((float(pts[i, 0]), float(pts[i, 1])))
+        for j in near:
+            if ids[j] < 0:
+                ids[j] = vid
+    return ids, vertices
 
 
 def _extract_fill(style, fill_attr):
@@ -142,7 +197,10 @@ class Mesh:
     faces: List[Face]
     vertices: List[Tuple[float, float]]
     edges: List[Edge]
-    vertex_edges: List[List[int]]  # for each vertex, list of incident edge indices
+    # Incident edges in CSR form: vertex v's edges are
+    # vertex_edge_ids[vertex_edge_ptr[v]:vertex_edge_ptr[v + 1]]
+    vertex_edge_ptr: np.ndarray   # int64, shape (V + 1,)
+    vertex_edge_ids: np.ndarray   # int64, shape (2E,)
     boundary_vertices: Set[int]
     bbox: Tuple[float, float, float, float]  # (minx, miny, maxx, maxy)
     crossing_pairs: List[Tuple[int, int]]  # candidate chord pairs that cross
@@ -180,11 +238,10 @@ def parse_svg_polygons(svg_path: str) -> Dict[str, List[Polygon]]:
             if fill and d:
                 try:
                     path = parse_path(d)
-                    poly = _path_to_polygon(path)
-                    if poly and poly.area > 0:
-                        coords = list(poly.exterior.coords)
-                        t_coords = [_apply_transform(x, y, combined_t) for x, y in coords]
-                        t_poly = Polygon(t_coords).buffer(0)
+                    for poly in _path_to_polygons(path):
+                        t_rings = [[_apply_transform(x, y, combined_t) for x, y in ring.coords]
+                                   for ring in [poly.exterior, *poly.interiors]]
+                        t_poly = shapely.make_valid(Polygon(t_rings[0], t_rings[1:]))
                         for p in _iter_polygons(t_poly):
                             if p.area > 0:
                                 polys_by_color[fill].append(p)
@@ -209,9 +266,13 @@ def build_mesh_from_svg(svg_path: str, vertex_snap_tol: float = 0.1) -> Mesh:
 
     colours = list(polys_by_colour.keys())
 
-    unions: Dict[str, Polygon] = {}
-    for col in colours:
-        unions[col] = unary_union(polys_by_colour[col]).buffer(0)
+    # The per-colour unions are independent; GEOS releases the GIL, so run
+    # them concurrently.
+    def colour_union(col):
+        return shapely.make_valid(unary_union(polys_by_colour[col]))
+
+    with ThreadPoolExecutor(max_workers=len(colours)) as ex:
+        unions: Dict[str, Polygon] = dict(zip(colours, ex.map(colour_union, colours)))
 
     bg_colour = max(colours, key=lambda c: unions[c].area if hasattr(unions[c], 'area') else 0)
     fg_colour = [c for c in colours if c != bg_colour][0]
@@ -231,14 +292,22 @@ def build_mesh_from_svg(svg_path: str, vertex_snap_tol: float = 0.1) -> Mesh:
     merged_lines = unary_union(lines)
     raw_faces = list(polygonize(merged_lines))
 
+    # Classify all faces at once: one representative point per face, tested
+    # against prepared geometries.
+    for geom in (heart_outline, fg_geom, bg_geom):
+        shapely.prepare(geom)
+    reps = shapely.point_on_surface(np.asarray(raw_faces, dtype=object))
+    in_heart = shapely.contains(heart_outline, reps)
+    in_fg = shapely.contains(fg_geom, reps)
+    in_bg = shapely.contains(bg_geom, reps)
+
     faces: List[Face] = []
-    for poly in raw_faces:
-        rep = poly.representative_point()
-        if not heart_outline.contains(rep):
+    for poly, inside, fg, bg in zip(raw_faces, in_heart, in_fg, in_bg):
+        if not inside:
             continue
-        if fg_geom.contains(rep):
+        if fg:
             colour = 1
-        elif bg_geom.contains(rep):
+        elif bg:
             colour = 0
         else:
             continue
@@ -246,28 +315,20 @@ def build_mesh_from_svg(svg_path: str, vertex_snap_tol: float = 0.1) -> Mesh:
 
     print(f"  Found {len(faces)} faces")
 
-    # Build vertex and edge structures
-    def q(pt):
-        x, y = pt
-        return (round(x / vertex_snap_tol) * vertex_snap_tol,
-                round(y / vertex_snap_tol) * vertex_snap_tol)
-
-    vertex_index: Dict[Tuple[float, float], int] = {}
-    vertices: List[Tuple[float, float]] = []
-
-    def get_vid(pt) -> int:
-        key = q(pt)
-        if key not in vertex_index:
-            vertex_index[key] = len(vertices)
-            vertices.append(key)
-        return vertex_index[key]
+    # Build vertex and edge structures; coincident points are merged with a
+    # KD-tree so near-equal coordinates never split across a rounding grid.
+    rings = [list(f.polygon.exterior.coords)[:-1] for f in faces]
+    all_ids, vertices = _snap_vertices([pt for ring in rings for pt in ring],
+                                       vertex_snap_tol)
+    all_ids = all_ids.tolist()
 
     face_boundary_verts: List[List[int]] = []
     edge_faces: Dict[Tuple[int, int], List[int]] = defaultdict(list)
 
-    for fi, f in enumerate(faces):
-        ring_coords = list(f.polygon.exterior.coords)[:-1]
-        vids = [get_vid(pt) for pt in ring_coords]
+    offset = 0
+    for fi, ring in enumerate(rings):
+        vids = all_ids[offset:offset + len(ring)]
+        offset += len(ring)
         face_boundary_verts.append(vids)
         for i in range(len(vids)):
             v1, v2 = vids[i], vids[(i + 1) % len(vids)]
@@ -276,15 +337,18 @@ def build_mesh_from_svg(svg_path: str, vertex_snap_tol: float = 0.1) -> Mesh:
                 edge_faces[key].append(fi)
 
     edges: List[Edge] = []
-    vertex_edges: List[List[int]] = [[] for _ in range(len(vertices))]
 
     for (v1, v2), flist in edge_faces.items():
         if len(flist) == 2:
             delta = 1 if faces[flist[0]].color != faces[flist[1]].color else 0
-            eid = len(edges)
             edges.append(Edge(v1=v1, v2=v2, delta=delta))
-            vertex_edges[v1].append(eid)
-            vertex_edges[v2].append(eid)
+
+    # Vertex -> incident edges as CSR; a stable sort of the flattened
+    # endpoint array groups edge ids by vertex while keeping edge order.
+    edge_vu = np.array([(e.v1, e.v2) for e in edges], dtype=np.int64).reshape(-1, 2)
+    counts = np.bincount(edge_vu.ravel(), minlength=len(vertices))
+    vertex_edge_ptr = np.concatenate([[0], np.cumsum(counts)])
+    vertex_edge_ids = np.argsort(edge_vu.ravel(), kind="stable") // 2
 
     delta1 = sum(1 for e in edges if e.delta == 1)
     print(f"  Found {len(edges)} boundary edges ({delta1} color boundaries), {len(vertices)} vertices")
@@ -313,7 +377,8 @@ def build_mesh_from_svg(svg_path: str, vertex_snap_tol: float = 0.1) -> Mesh:
         faces=faces,
         vertices=vertices,
         edges=edges,
-        vertex_edges=vertex_edges,
+        vertex_edge_ptr=vertex_edge_ptr,
+        vertex_edge_ids=vertex_edge_ids,
         boundary_vertices=boundary_vertices,
         bbox=(minx, miny, maxx, maxy),
         crossing_pairs=crossing_pairs,
@@ -330,18 +395,95 @@ class CutSolution:
     purple_edges: List[int]
 
 
-def solve_cuts(mesh: Mesh) -> CutSolution:
+def _greedy_cut(mesh: Mesh, left: List[int], right: List[int],
+                top: List[int], bottom: List[int]):
+    """
+    Greedy feasible cut: a shortest yellow path from left to right over
+    colour-boundary edges, then a shortest purple path from top to bottom over
+    the edges yellow left unused. Returns (yellow_edges, purple_edges), or
+    None if either path does not exist.
+    """
+    if not (left and right and top and bottom):
+        return None
+
+    edge_ptr = mesh.vertex_edge_ptr.tolist()
+    edge_ids = mesh.vertex_edge_ids.tolist()
+
+    def shortest_path(sources, targets, blocked):
+        # Multi-source BFS; the first target reached ends the path, so the
+        # path touches exactly one source and one target (its endpoints).
+        targets = set(targets)
+        prev: Dict[int, int] = {v: -1 for v in sources}
+        queue = deque(sources)
+        while queue:
+            v = queue.popleft()
+            if v in targets:
+                path = []
+                while prev[v] >= 0:
+                    e = prev[v]
+                    path.append(e)
+                    edge = mesh.edges[e]
+                    v = edge.v1 if edge.v2 == v else edge.v2
+                return path
+            for e in edge_ids[edge_ptr[v]:edge_ptr[v + 1]]:
+                edge = mesh.edges[e]
+                if edge.delta != 1 or e in blocked:
+                    continue
+                u = edge.v1 if edge.v2 == v else edge.v2
+                if u not in prev:
+                    prev[u] = e
+                    queue.append(u)
+        return None
+
+    yellow = shortest_path(left, right, set())
+    if yellow is None:
+        return None
+    purple = shortest_path(top, bottom, set(yellow))
+    if purple is None:
+        return None
+    return yellow, purple
+
+
+def solve_cuts(mesh: Mesh,
+               time_limit: float = 60.0,
+               num_workers: int = 0,
+               log_progress: bool = False) -> CutSolution:
     """
     ILP-based solver using CP-SAT:
     - Each color boundary edge must be used by exactly one color
     - Vertices have degree 0, 1, or 2 for each color
     - Minimize endpoints to encourage connected paths
     - Yellow endpoints on left/right, purple on top/bottom
-    """
-    model = cp_model.CpModel()
 
+    num_workers=0 uses one search worker per CPU core.
+    """
     num_edges = len(mesh.edges)
     num_vertices = len(mesh.vertices)
+    boundary_vertices = mesh.boundary_vertices
+
+    # Endpoint position constraints: yellow left↔right, purple top↔bottom
+    minx, miny, maxx, maxy = mesh.bbox
+    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+
+    left, right, top, bottom = [], [], [], []
+    for v in boundary_vertices:
+        vx, vy = mesh.vertices[v]
+        angle = math.atan2(vy - cy, vx - cx)
+        if abs(angle) > 2.35:
+            left.append(v)
+        elif abs(angle) < 0.79:
+            right.append(v)
+        elif angle < 0:
+            top.append(v)
+        else:
+            bottom.append(v)
+
+    print(f"  Boundary sides: left={len(left)}, right={len(right)}, top={len(top)}, bottom={len(bottom)}")
+
+    # Cheap greedy cut to warm-start the search.
+    greedy = _greedy_cut(mesh, left, right, top, bottom)
+
+    model = cp_model.CpModel()
 
     # Boolean variables: y[e] = 1 if yellow uses edge e, p[e] = 1 if purple
     y = [model.NewBoolVar(f"y_{e}") for e in range(num_edges)]
@@ -357,16 +499,17 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
             model.Add(y[e_idx] == p[e_idx])
 
     # Degree and endpoint variables
-    boundary_vertices = mesh.boundary_vertices
     is_epY = []
     is_epP = []
+    edge_ptr = mesh.vertex_edge_ptr.tolist()
+    edge_ids = mesh.vertex_edge_ids.tolist()
+
+    no_endpoint = cp_model.Domain.FromValues([0, 2])
 
     for v in range(num_vertices):
-        inc = mesh.vertex_edges[v]
-        dY = model.NewIntVar(0, len(inc), f"degY_{v}")
-        dP = model.NewIntVar(0, len(inc), f"degP_{v}")
-        model.Add(dY == sum(y[e] for e in inc))
-        model.Add(dP == sum(p[e] for e in inc))
+        inc = edge_ids[edge_ptr[v]:edge_ptr[v + 1]]
+        dY = cp_model.LinearExpr.Sum([y[e] for e in inc])
+        dP = cp_model.LinearExpr.Sum([p[e] for e in inc])
 
         epY = model.NewBoolVar(f"epY_{v}")
         epP = model.NewBoolVar(f"epP_{v}")
@@ -375,41 +518,25 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
 
         if v in boundary_vertices:
             # Boundary vertices: degree 0, 1 (endpoint), or 2 (pass-through)
-            model.AddAllowedAssignments([dY, epY], [(0, 0), (1, 1), (2, 0)])
-            model.AddAllowedAssignments([dP, epP], [(0, 0), (1, 1), (2, 0)])
+            model.Add(dY == 1).OnlyEnforceIf(epY)
+            model.AddLinearExpressionInDomain(dY, no_endpoint).OnlyEnforceIf(epY.Not())
+            model.Add(dP == 1).OnlyEnforceIf(epP)
+            model.AddLinearExpressionInDomain(dP, no_endpoint).OnlyEnforceIf(epP.Not())
         else:
             # Interior vertices: degree 0 or 2 only (no endpoints inside)
             model.Add(epY == 0)
             model.Add(epP == 0)
-            model.AddAllowedAssignments([dY], [(0,), (2,)])
-            model.AddAllowedAssignments([dP], [(0,), (2,)])
+            model.AddLinearExpressionInDomain(dY, no_endpoint)
+            model.AddLinearExpressionInDomain(dP, no_endpoint)
 
     # Count endpoints
     total_epY = sum(is_epY)
     total_epP = sum(is_epP)
 
-    # Require exactly one path per color (exactly 2 endpoints each)
-    model.Add(total_epY == 2)
-    model.Add(total_epP == 2)
-
-    # Endpoint position constraints: yellow left↔right, purple top↔bottom
-    minx, miny, maxx, maxy = mesh.bbox
-    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
-
-    left, right, top, bottom = [], [], [], []
-    for v in boundary_vertices:
-        vx, vy = mesh.vertices[v]
-        angle = math.atan2(vy - cy, vx - cx)
-        if abs(angle) > 2.35:
-            left.append(v)
-        elif abs(angle) < 0.79:
-            right.append(v)
-        elif angle < 0:
-            top.append(v)
-        else:
-            bottom.append(v)
-
-    print(f"  Boundary sides: left={len(left)}, right={len(right)}, top={len(top)}, bottom={len(bottom)}")
+    # Require at least one path per color; the objective drives each colour
+    # down to a single path (exactly 2 endpoints) whenever that is feasible.
+    model.Add(total_epY >= 2)
+    model.Add(total_epP >= 2)
 
     # Soft preference for endpoint positions (don't make infeasible)
     if left and right:
@@ -419,14 +546,29 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
         model.Add(sum(is_epP[v] for v in top) >= 1)
         model.Add(sum(is_epP[v] for v in bottom) >= 1)
 
-    # Objective: maximize edge coverage (since we allow unused edges)
+    # Objective (lexicographic): fewest endpoints first, then maximize edge
+    # coverage (since we allow unused edges). The endpoint weight exceeds the
+    # largest possible edge count, so no amount of coverage outweighs an
+    # extra endpoint.
     total_edges_used = sum(y) + sum(p)
-    model.Maximize(total_edges_used)
+    endpoint_weight = 2 * num_edges + 1
+    model.Maximize(total_edges_used - endpoint_weight * (total_epY + total_epP))
+
+    if greedy is not None:
+        g_yellow, g_purple = set(greedy[0]), set(greedy[1])
+        for e in range(num_edges):
+            model.AddHint(y[e], e in g_yellow)
+            model.AddHint(p[e], e in g_purple)
 
     # Solve
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60.0
-    solver.parameters.num_search_workers = 8
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers or os.cpu_count() or 8
+    solver.parameters.cp_model_presolve = True
+    solver.parameters.linearization_level = 2
+    solver.parameters.symmetry_level = 2
+    solver.parameters.cp_model_probing_level = 2
+    solver.parameters.log_search_progress = log_progress
 
     print("  Running CP-SAT solver...")
     status = solver.Solve(model)
@@ -498,7 +640,8 @@ def write_debug_svg(output_path: str, mesh: Mesh) -> None:
 # ---------------------------------------------------------------------------
 
 def write_svg_with_cuts(input_svg: str, output_svg: str, mesh: Mesh, sol: CutSolution) -> None:
-    tree = ET.parse(input_svg)
+    xml = _lxml_etree if _lxml_etree is not None else ET
+    tree = xml.parse(input_svg)
     root = tree.getroot()
 
     tag = root.tag
@@ -509,9 +652,9 @@ def write_svg_with_cuts(input_svg: str, output_svg: str, mesh: Mesh, sol: CutSol
 
     def mk(tag_name: str, attrib: Dict[str, str]):
         if ns:
-            return ET.Element(f"{{{ns}}}{tag_name}", attrib)
+            return xml.Element(f"{{{ns}}}{tag_name}", attrib)
         else:
-            return ET.Element(tag_name, attrib)
+            return xml.Element(tag_name, attrib)
 
     cuts_group = mk("g", {"id": "julehjerte_cuts"})
 
@@ -541,7 +684,8 @@ def write_svg_with_cuts(input_svg: str, output_svg: str, mesh: Mesh, sol: CutSol
         cuts_group.append(line)
 
     root.append(cuts_group)
-    tree.write(output_svg, encoding="utf-8", xml_declaration=True)
+    with open(output_svg, "wb") as fh:
+        tree.write(fh, encoding="utf-8", xml_declaration=True)
 
 
 # ---------------------------------------------------------------------------
@@ -555,6 +699,9 @@ def main():
     parser.add_argument("input_svg", help="Input SVG file (2 fill colours)")
     parser.add_argument("output_svg", help="Output SVG with cut lines overlaid")
     parser.add_argument("--debug", action="store_true", help="Write debug mesh visualization")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="CP-SAT time limit in seconds")
+    parser.add_argument("--workers", type=int, default=0, help="CP-SAT search workers (0 = one per CPU)")
+    parser.add_argument("--log-solver", action="store_true", help="Print CP-SAT search progress")
     args = parser.parse_args()
 
     print(f"Reading {args.input_svg}...")
@@ -566,7 +713,8 @@ def main():
         write_debug_svg(debug_path, mesh)
 
     print("Solving for cuts...")
-    sol = solve_cuts(mesh)
+    sol = solve_cuts(mesh, time_limit=args.time_limit,
+                     num_workers=args.workers, log_progress=args.log_solver)
     print(f"  Yellow: {len(sol.yellow_edges)} edges")
     print(f"  Purple: {len(sol.purple_edges)} edges")
 
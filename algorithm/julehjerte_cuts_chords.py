@@ -10,30 +10,46 @@ Usage:
     python julehjerte_cuts_chords.py input.svg output.svg
 
 Dependencies:
-    pip install shapely svgpathtools ortools
+    pip install numpy shapely svgpathtools ortools
+    pip install numba  # optional, faster odd-vertex pairing
+    pip install networkx  # optional, shorter odd-vertex pairing edges
 """
 
 import argparse
 import math
 import re
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Set, Optional
-from collections import defaultdict
+from typing import List, Tuple, Dict, Set, Optional, Union
+from collections import defaultdict, deque
 
-from shapely.geometry import Polygon, MultiPolygon, LineString, LinearRing, Point
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, MultiPolygon, LineString
 from shapely.ops import polygonize, unary_union
 
-from svgpathtools import parse_path
+from svgpathtools import parse_path, Arc
 
 from ortools.sat.python import cp_model
 
 import xml.etree.ElementTree as ET
 
+try:  # optional: minimum-weight odd-vertex matching
+    import networkx as nx
+except ImportError:
+    nx = None
+
 
 # ---------------------------------------------------------------------------
 # Geometry helpers
 # ---------------------------------------------------------------------------
 
+_FILL_RE = re.compile(r"fill:\s*([^;]+)")
+_SEP_RE = re.compile(r"[\s,]+")
+_ROTATE_RE = re.compile(r"rotate\(([^)]+)\)")
+_MATRIX_RE = re.compile(r"matrix\(([^)]+)\)")
+_TRANSLATE_RE = re.compile(r"translate\(([^)]+)\)")
+
+
 def _iter_polygons(geom):
     if isinstance(geom, Polygon):
         if not geom.is_empty:
@@ -48,18 +64,22 @@ def _iter_polygons(geom):
 
 def _path_to_polygon(path, samples_per_segment: int = 16) -> Polygon:
     """Approximate an SVG path by sampling."""
-    pts: List[Tuple[float, float]] = []
-    for seg in path:
-        for i in range(samples_per_segment):
-            t = i / float(samples_per_segment)
-            z = seg.point(t)
-            pts.append((z.real, z.imag))
+    # svgpathtools evaluates lines and Beziers on a whole parameter array
+    # with the same arithmetic as seg.point(t), so samples match the scalar
+    # sampler bit for bit; arcs are sampled pointwise.
+    t = np.arange(samples_per_segment) / float(samples_per_segment)
+    samples = np.empty((len(path), samples_per_segment), dtype=complex)
+    for i, seg in enumerate(path):
+        if isinstance(seg, Arc):
+            samples[i] = [seg.point(ti) for ti in t]
+        else:
+            samples[i] = seg.point(t)
+    pts = samples.ravel()
     if len(path) > 0:
-        z = path[-1].point(1.0)
-        pts.append((z.real, z.imag))
+        pts = np.append(pts, path[-1].point(1.0))
     if len(pts) < 3:
         raise ValueError("Path has too few points to form a polygon")
-    poly = Polygon(pts).buffer(0)
+    poly = Polygon(np.column_stack([pts.real, pts.imag])).buffer(0)
     if isinstance(poly, MultiPolygon):
         poly = max(_iter_polygons(poly), key=lambda p: p.area)
     return poly
@@ -71,8 +91,8 @@ def _extract_fill_attr(attr: Dict[str, str]) -> Optional[str]:
 
 
 def _extract_fill(style: str, fill_attr: Optional[str]) -> Optional[str]:
-    if style:
-        m = re.search(r"fill:\s*([^;]+)", style)
+    if style and "fill:" in style:
+        m = _FILL_RE.search(style)
         if m:
             val = m.group(1).strip()
             if val.lower() != "none":
@@ -87,22 +107,22 @@ def _parse_transform(transform_str: str) -> Tuple[float, float, float, float, fl
     if not transform_str:
         return (a, b, c, d, e, f)
 
-    rotate_match = re.search(r"rotate\(([^)]+)\)", transform_str)
+    rotate_match = _ROTATE_RE.search(transform_str)
     if rotate_match:
-        parts = re.split(r"[\s,]+", rotate_match.group(1).strip())
+        parts = _SEP_RE.split(rotate_match.group(1).strip())
         angle = float(parts[0]) * math.pi / 180
         cos_a, sin_a = math.cos(angle), math.sin(angle)
         a, b, c, d = cos_a, sin_a, -sin_a, cos_a
 
-    matrix_match = re.search(r"matrix\(([^)]+)\)", transform_str)
+    matrix_match = _MATRIX_RE.search(transform_str)
     if matrix_match:
-        parts = [float(x) for x in re.split(r"[\s,]+", matrix_match.group(1).strip())]
+        parts = [float(x) for x in _SEP_RE.split(matrix_match.group(1).strip())]
         if len(parts) >= 6:
             a, b, c, d, e, f = parts[:6]
 
-    translate_match = re.search(r"translate\(([^)]+)\)", transform_str)
+    translate_match = _TRANSLATE_RE.search(transform_str)
     if translate_match:
-        parts = [float(x) for x in re.split(r"[\s,]+", translate_match.group(1).strip())]
+        parts = [float(x) for x in _SEP_RE.split(translate_match.group(1).strip())]
         e = parts[0] if len(parts) > 0 else 0
         f = parts[1] if len(parts) > 1 else 0
 
@@ -128,34 +148,199 @@ def _multiply_transforms(t1: Tuple[float, float, float, float, float, float],
     )
 
 
-def _rect_to_polygon(x: float, y: float, w: float, h: float,
-                     t: Tuple[float, float, float, float, float, float]) -> Polygon:
+def _rect_to_ring(x: float, y: float, w: float, h: float,
+                  t: Tuple[float, float, float, float, float, float]) -> List[Tuple[float, float]]:
     corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
-    return Polygon([_apply_transform(px, py, t) for px, py in corners])
+    return [_apply_transform(px, py, t) for px, py in corners]
 
 
-# ---------------------------------------------------------------------------
-# Mesh data structures
-# ---------------------------------------------------------------------------
+def _greedy_pairs_py(pts: np.ndarray) -> np.ndarray:
+    """
+    Greedy nearest-neighbour matching of points (shape (k, 2)). Repeatedly
+    takes the last unmatched point and pairs it with the nearest earlier
+    unmatched one (lowest index on ties). Returns index pairs, shape (k//2, 2).
+    """
+    n = pts.shape[0]
+    used = np.zeros(n, dtype=np.bool_)
+    pairs = np.empty((n // 2, 2), dtype=np.int64)
+    k = 0
+    for i in range(n - 1, 0, -1):
+        if used[i]:
+            continue
+        best = -1
+        best_d = np.inf
+        for j in range(i):
+            if used[j]:
+                continue
+            dx = pts[i, 0] - pts[j, 0]
+            dy = pts[i, 1] - pts[j, 1]
+            d = dx * dx + dy * dy
+            if d < best_d:
+                best_d = d
+                best = j
+        if best < 0:
+            break
+        used[i] = True
+        used[best] = True
+        pairs[k, 0] = i
+        pairs[k, 1] = best
+        k += 1
+    return pairs[:k]
+
+
+def _lazy_njit(py_func):
+    """
+    Wrap py_func so that its first call compiles it with numba (cached on
+    disk) and every call runs the compiled version; without numba it runs
+    py_func. numba is imported only then, since importing it and loading
+    the cache costs about half a second, more than most meshes take.
+    """
+    compiled = None
 
-@dataclass
-class Face:
-    polygon: Polygon
-    color: int  # 0 or 1
+    def call(*args):
+        nonlocal compiled
+        if compiled is None:
+            try:
+                from numba import njit
+            except ImportError:
+                compiled = py_func
+            else:
+                compiled = njit(cache=True)(py_func)
+        return compiled(*args)
 
+    return call
 
-@dataclass
-class Edge:
-    v1: int
-    v2: int
-    delta: int  # 1 if crossing a colour boundary; 0 if inside a single-colour region
 
+_greedy_pairs = _lazy_njit(_greedy_pairs_py)
+
+
+# Blossom matching is cubic in the number of candidate edges, so each point
+# only offers edges to its nearest neighbours (optimal pairs are nearly
+# always among them), and larger odd-vertex sets use the greedy pairing.
+_MATCHING_MAX_POINTS = 200
+_MATCHING_NEIGHBOURS = 8
+
+
+def _matching_candidates(pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Candidate edges (ii, jj, length) linking each of the k >= 2 points to
+    its _MATCHING_NEIGHBOURS nearest others, so at most
+    _MATCHING_NEIGHBOURS * k edges (pairs chosen from both ends repeat).
+    """
+    n = len(pts)
+    dist = np.hypot(pts[:, None, 0] - pts[None, :, 0], pts[:, None, 1] - pts[None, :, 1])
+    np.fill_diagonal(dist, np.inf)
+    k = min(_MATCHING_NEIGHBOURS, n - 1)
+    nbrs = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    ii = np.repeat(np.arange(n), k)
+    jj = nbrs.ravel()
+    return ii, jj, dist[ii, jj]
+
+
+def _match_pairs(pts: np.ndarray) -> np.ndarray:
+    """
+    Pair up points (shape (k, 2)) keeping the total Euclidean length of the
+    pairs small, via networkx's minimum-weight matching on the
+    _matching_candidates graph. Falls back to greedy nearest-neighbour
+    pairing without networkx, for large k, or when that graph has no
+    perfect matching. Returns index pairs, shape (k//2, 2).
+    """
+    n = len(pts)
+    if nx is None or n > _MATCHING_MAX_POINTS or n < 2:
+        return _greedy_pairs(pts)
+    ii, jj, w = _matching_candidates(pts)
+    G = nx.Graph()
+    G.add_weighted_edges_from(zip(ii.tolist(), jj.tolist(), w.tolist()))
+    matching = nx.min_weight_matching(G)
+    if len(matching) < n // 2:
+        return _greedy_pairs(pts)
+    matching = sorted((max(a, b), min(a, b)) for a, b in matching)
+    return np.array(matching, dtype=np.int64).reshape(-1, 2)
+
+
+def _delta_degree(edge_v1, edge_v2, edge_delta, num_vertices: int) -> np.ndarray:
+    """Number of colour-boundary (delta=1) edges incident to each vertex."""
+    on_boundary = np.asarray(edge_delta) == 1
+    ends = np.concatenate([np.asarray(edge_v1, dtype=np.int64)[on_boundary],
+                           np.asarray(edge_v2, dtype=np.int64)[on_boundary]])
+    return np.bincount(ends, minlength=num_vertices)
+
+
+_STRTREE_MIN_SEGMENTS = 32
+
+
+# Relative tolerance below which an orientation test counts as collinear.
+_ORIENT_EPS = 1e-9
+
+
+def _crossing_segment_pairs(p1: np.ndarray, p2: np.ndarray,
+                            ends: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Index pairs (i, j), i < j, of segments p1[i]-p2[i] that properly cross,
+    i.e. their interiors meet in a single point (Shapely's `crosses`).
+    Segments sharing an endpoint id in `ends` (shape (m, 2)) never cross.
+
+    Only pairs whose bounding boxes overlap are tested: small sets compare
+    all boxes directly, larger ones query an STRtree.
+    """
+    m = len(p1)
+    if m < _STRTREE_MIN_SEGMENTS:
+        lo = np.minimum(p1, p2)
+        hi = np.maximum(p1, p2)
+        overlap = ((lo[:, None, 0] <= hi[None, :, 0]) & (hi[:, None, 0] >= lo[None, :, 0]) &
+                   (lo[:, None, 1] <= hi[None, :, 1]) & (hi[:, None, 1] >= lo[None, :, 1]))
+        ii, jj = np.nonzero(np.triu(overlap, k=1))
+    else:
+        segs = shapely.linestrings(np.stack([p1, p2], axis=1))
+        ii, jj = shapely.STRtree(segs).query(segs)
+        keep = ii < jj
+        ii, jj = ii[keep], jj[keep]
+        order = np.lexsort((jj, ii))
+        ii, jj = ii[order], jj[order]
+
+    def orient(a, b, q):
+        # sign of cross(b - a, q - a), row-wise; values within rounding of
+        # zero (q on or next to line a-b) count as 0
+        d = b - a
+        r = q - a
+        c = d[:, 0] * r[:, 1] - d[:, 1] * r[:, 0]
+        tol = _ORIENT_EPS * np.hypot(d[:, 0], d[:, 1]) * np.hypot(r[:, 0], r[:, 1])
+        return np.where(np.abs(c) <= tol, 0.0, np.sign(c))
+
+    ea, eb = ends[ii], ends[jj]
+    shared = ((ea[:, 0] == eb[:, 0]) | (ea[:, 0] == eb[:, 1]) |
+              (ea[:, 1] == eb[:, 0]) | (ea[:, 1] == eb[:, 1]))
+    ii, jj = ii[~shared], jj[~shared]
+
+    a1, a2, b1, b2 = p1[ii], p2[ii], p1[jj], p2[jj]
+    sa = orient(a1, a2, b1) * orient(a1, a2, b2)
+    sb = orient(b1, b2, a1) * orient(b1, b2, a2)
+    cross = (sa < 0) & (sb < 0)
+
+    # Near-touching pairs (an endpoint on or next to the other segment) are
+    # left to Shapely, whose crosses() rejects T-junctions.
+    near = ~cross & (sa <= 0) & (sb <= 0)
+    if near.any():
+        k = np.flatnonzero(near)
+        cross[k] = shapely.crosses(shapely.linestrings(np.stack([a1[k], a2[k]], axis=1)),
+                                   shapely.linestrings(np.stack([b1[k], b2[k]], axis=1)))
+
+    return list(zip(ii[cross].tolist(), jj[cross].tolist()))
+
+
+# ---------------------------------------------------------------------------
+# Mesh data structures
+# ---------------------------------------------------------------------------
 
 @dataclass
 class Mesh:
-    faces: List[Face]
+    # Faces and edges are stored as parallel arrays (one entry per face/edge).
+    face_polygons: List[Polygon]
+    face_color: np.ndarray  # int8, 0 or 1
     vertices: List[Tuple[float, float]]
-    edges: List[Edge]
+    edge_v1: np.ndarray     # int32
+    edge_v2: np.ndarray     # int32
+    edge_delta: np.ndarray  # int32, 1 if crossing a colour boundary; 0 if inside a single-colour region
     vertex_edges: List[List[int]]  # for each vertex, list of incident edge indices
     boundary_vertices: Set[int]
     bbox: Tuple[float, float, float, float]  # (minx, miny, maxx, maxy)
@@ -166,16 +351,31 @@ class Mesh:
 # SVG -> Mesh (boundaries + chords only)
 # ---------------------------------------------------------------------------
 
-def parse_svg_polygons(svg_path: str) -> Dict[str, List[Polygon]]:
-    """Parse the SVG tree and extract polygons grouped by fill color."""
-    tree = ET.parse(svg_path)
-    root = tree.getroot()
-    polys_by_color: Dict[str, List[Polygon]] = defaultdict(list)
+def _as_tree(svg: Union[str, ET.ElementTree]) -> ET.ElementTree:
+    """Accept an already parsed tree; parse anything else (a str or Path)."""
+    return svg if isinstance(svg, ET.ElementTree) else ET.parse(svg)
+
 
-    def process(elem, parent_t):
+def parse_svg_polygons(svg: Union[str, ET.ElementTree]) -> Dict[str, List[Polygon]]:
+    """Parse the SVG tree and extract polygons grouped by fill color."""
+    root = _as_tree(svg).getroot()
+
+    # Collect transformed outer rings during the walk and build all polygons
+    # of a colour in one shapely.polygons call afterwards. Path rings may
+    # self-intersect and are marked for a buffer(0) repair.
+    rings_by_color: Dict[str, List[List[Tuple[float, float]]]] = defaultdict(list)
+    repair_by_color: Dict[str, List[bool]] = defaultdict(list)
+
+    # Iterative pre-order walk; children are pushed in reverse so they are
+    # visited in document order.
+    stack = [(root, (1.0, 0.0, 0.0, 1.0, 0.0, 0.0))]
+    while stack:
+        elem, parent_t = stack.pop()
         t_str = elem.get("transform", "")
-        local_t = _parse_transform(t_str)
-        combined_t = _multiply_transforms(parent_t, local_t)
+        if t_str:
+            combined_t = _multiply_transforms(parent_t, _parse_transform(t_str))
+        else:
+            combined_t = parent_t
         tag = elem.tag.split("}")[-1]
 
         if tag == "rect":
@@ -186,9 +386,8 @@ def parse_svg_polygons(svg_path: str) -> Dict[str, List[Polygon]]:
                 w = float(elem.get("width", 0))
                 h = float(elem.get("height", 0))
                 if w > 0 and h > 0:
-                    poly = _rect_to_polygon(x, y, w, h, combined_t)
-                    if poly.area > 0:
-                        polys_by_color[fill].append(poly)
+                    rings_by_color[fill].append(_rect_to_ring(x, y, w, h, combined_t))
+                    repair_by_color[fill].append(False)
 
         elif tag == "path":
             fill = _extract_fill(elem.get("style", ""), elem.get("fill"))
@@ -199,21 +398,28 @@ def parse_svg_polygons(svg_path: str) -> Dict[str, List[Polygon]]:
                     poly = _path_to_polygon(path)
                     coords = list(poly.exterior.coords)
                     t_coords = [_apply_transform(x, y, combined_t) for x, y in coords]
-                    t_poly = Polygon(t_coords).buffer(0)
-                    for p in _iter_polygons(t_poly):
-                        if p.area > 0:
-                            polys_by_color[fill].append(p)
+                    if len(t_coords) >= 4:
+                        rings_by_color[fill].append(t_coords)
+                        repair_by_color[fill].append(True)
                 except Exception:
                     pass
 
-        for child in elem:
-            process(child, combined_t)
+        stack.extend((child, combined_t) for child in reversed(elem))
 
-    process(root, (1, 0, 0, 1, 0, 0))
+    polys_by_color: Dict[str, List[Polygon]] = defaultdict(list)
+    for fill, rings in rings_by_color.items():
+        ring_index = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+        polys = shapely.polygons(shapely.linearrings(np.concatenate(rings), indices=ring_index))
+        repair = np.array(repair_by_color[fill])
+        polys[repair] = shapely.buffer(polys[repair], 0)
+        for poly in polys:
+            for p in _iter_polygons(poly):
+                if p.area > 0:
+                    polys_by_color[fill].append(p)
     return polys_by_color
 
 
-def build_mesh_from_svg(svg_path: str,
+def build_mesh_from_svg(svg: Union[str, ET.ElementTree],
                         vertex_snap_tol: float = 1e-6) -> Mesh:
     """
     Parse the SVG, construct a coloured planar subdivision, and build a graph:
@@ -224,11 +430,12 @@ def build_mesh_from_svg(svg_path: str,
           - boundary between faces of same colour (delta=0)
           - straight chords inside each face between suitable boundary vertices (delta=0)
 
-    Also pre-computes which chords geometrically cross.
+    Also pre-computes which chords geometrically cross. `svg` may be a file
+    path or a parsed ElementTree (to share one parse with write_svg_with_cuts).
     """
 
     # --- Parse SVG and collect polygons per fill colour ---
-    polys_by_colour: Dict[str, List[Polygon]] = parse_svg_polygons(svg_path)
+    polys_by_colour: Dict[str, List[Polygon]] = parse_svg_polygons(svg)
 
     if len(polys_by_colour) != 2:
         raise ValueError(
@@ -246,22 +453,20 @@ def build_mesh_from_svg(svg_path: str,
     bg_geom = unions[bg_colour]
     fg_geom = unions[fg_colour]
 
-    all_union = unary_union([bg_geom, fg_geom]).buffer(0)
+    # Unions of valid inputs are valid; no second buffer(0) needed.
+    colour_geoms = np.array([bg_geom, fg_geom], dtype=object)
+    all_union = shapely.unary_union(colour_geoms)
     heart_outline = max(_iter_polygons(all_union), key=lambda p: p.area)
     heart_outline = Polygon(heart_outline.exterior)
 
     # --- Planar subdivision from all boundaries ---
-    lines = []
-    for geom in [bg_geom, fg_geom]:
-        for poly in _iter_polygons(geom):
-            lines.append(LinearRing(poly.exterior.coords))
-            for ring in poly.interiors:
-                lines.append(LinearRing(ring.coords))
-
-    merged_lines = unary_union(lines)
+    # Both colours' boundaries (exteriors and holes) in one bulk call, noded
+    # by a single union.
+    merged_lines = shapely.unary_union(shapely.boundary(colour_geoms))
     raw_faces = list(polygonize(merged_lines))
 
-    faces: List[Face] = []
+    face_polygons: List[Polygon] = []
+    face_color: List[int] = []
     for poly in raw_faces:
         rep = poly.representative_point()
         if not heart_outline.contains(rep):
@@ -273,36 +478,41 @@ def build_mesh_from_svg(svg_path: str,
         else:
             # Treat uncovered regions inside the outline as background.
             colour = 0
-        faces.append(Face(polygon=poly, color=colour))
+        face_polygons.append(poly)
+        face_color.append(colour)
 
-    if not faces:
+    if not face_polygons:
         raise RuntimeError("No faces found inside heart region.")
 
     # --- Global vertex map (quantised) ---
-    def q(pt):
-        x, y = pt
-        return (round(x / vertex_snap_tol) * vertex_snap_tol,
-                round(y / vertex_snap_tol) * vertex_snap_tol)
-
-    vertex_index: Dict[Tuple[float, float], int] = {}
-    vertices: List[Tuple[float, float]] = []
-
-    def get_vid(pt) -> int:
-        key = q(pt)
-        if key not in vertex_index:
-            vertex_index[key] = len(vertices)
-            vertices.append(key)
-        return vertex_index[key]
+    # All ring points are snapped to the tolerance grid and deduplicated in
+    # one np.unique pass; ids are renumbered by first occurrence so vertex
+    # order matches the order in which faces visit them.
+    exteriors = shapely.get_exterior_ring(np.array(face_polygons, dtype=object))
+    ring_pts, ring_idx = shapely.get_coordinates(exteriors, return_index=True)
+    ring_len = np.bincount(ring_idx, minlength=len(face_polygons))
+    is_closing = np.zeros(len(ring_pts), dtype=bool)
+    is_closing[np.cumsum(ring_len) - 1] = True  # drop closing point
+    qpts = np.round(ring_pts[~is_closing] / vertex_snap_tol).astype(np.int64)
+    uniq, first, inv = np.unique(qpts, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    vertices: List[Tuple[float, float]] = [
+        (x, y) for x, y in (uniq[order] * vertex_snap_tol).tolist()
+    ]
+    ring_vids = np.split(rank[inv.ravel()], np.cumsum(ring_len - 1)[:-1])
 
     # Per-face boundary vertex sequences
     face_boundary_verts: List[List[int]] = []
 
     # Map undirected boundary edges to incident faces
-    edge_faces: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    # Undirected edges are keyed by a packed int, (min_vid << 32) | max_vid,
+    # which hashes faster than a tuple.
+    edge_faces: Dict[int, List[int]] = defaultdict(list)
 
-    for fi, f in enumerate(faces):
-        ring_coords = list(f.polygon.exterior.coords)[:-1]  # drop closing point
-        vids = [get_vid(pt) for pt in ring_coords]
+    for fi, vids in enumerate(ring_vids):
+        vids = vids.tolist()
         face_boundary_verts.append(vids)
         n = len(vids)
         for i in range(n):
@@ -310,77 +520,86 @@ def build_mesh_from_svg(svg_path: str,
             v2 = vids[(i + 1) % n]
             if v1 == v2:
                 continue
-            key = (v1, v2) if v1 < v2 else (v2, v1)
+            key = (v1 << 32 | v2) if v1 < v2 else (v2 << 32 | v1)
             edge_faces[key].append(fi)
 
     # --- Boundary edges between faces (delta = 0 or 1) ---
-    edges: List[Edge] = []
+    edge_v1: List[int] = []
+    edge_v2: List[int] = []
+    edge_delta: List[int] = []
     vertex_edges: List[List[int]] = [[] for _ in range(len(vertices))]
-    existing_edge_keys: Set[Tuple[int, int]] = set()
 
-    for (v1, v2), flist in edge_faces.items():
+    def add_edge(v1: int, v2: int, delta: int) -> int:
+        eid = len(edge_v1)
+        edge_v1.append(v1)
+        edge_v2.append(v2)
+        edge_delta.append(delta)
+        vertex_edges[v1].append(eid)
+        vertex_edges[v2].append(eid)
+        return eid
+    existing_edge_keys: Set[int] = set()
+
+    for key, flist in edge_faces.items():
         if len(flist) != 2:
             # boundary of heart; no interior edge
             continue
+        v1, v2 = key >> 32, key & 0xFFFFFFFF
         f1, f2 = flist
-        delta = 1 if faces[f1].color != faces[f2].color else 0
-        eid = len(edges)
-        edges.append(Edge(v1=v1, v2=v2, delta=delta))
-        vertex_edges[v1].append(eid)
-        vertex_edges[v2].append(eid)
-        existing_edge_keys.add((v1, v2) if v1 < v2 else (v2, v1))
+        add_edge(v1, v2, 1 if face_color[f1] != face_color[f2] else 0)
+        existing_edge_keys.add(key)
 
     # --- Add straight chords inside each face (delta = 0) ---
     # We also record per-face chord edges for later crossing checks.
-    face_chord_edges: List[List[int]] = [[] for _ in range(len(faces))]
+    face_chord_edges: List[List[int]] = [[] for _ in range(len(face_polygons))]
+
+    coords = np.asarray(vertices, dtype=float)
+
+    # A slightly eroded polygon per face, so chord interiors are strictly
+    # inside; all faces are eroded in one call.
+    face_arr = np.asarray(face_polygons, dtype=object)
+    inner_polys = shapely.buffer(face_arr, -1e-6)
+    empty = shapely.is_empty(inner_polys)
+    inner_polys[empty] = face_arr[empty]
+    shapely.prepare(inner_polys)
 
-    for fi, f in enumerate(faces):
+    for fi in range(len(face_polygons)):
         vids = face_boundary_verts[fi]
         n = len(vids)
-        poly = f.polygon
-        # A slightly eroded polygon to ensure chord interior is strictly inside
-        inner_poly = poly.buffer(-1e-6)
-        if inner_poly.is_empty:
-            inner_poly = poly
 
-        for i in range(n):
-            for j in range(i + 2, n):  # skip adjacent vertices; also avoids wrap
-                # Also skip edge that closes the ring
-                if i == 0 and j == n - 1:
-                    continue
-                v1 = vids[i]
-                v2 = vids[j]
-                key = (v1, v2) if v1 < v2 else (v2, v1)
-                if key in existing_edge_keys:
-                    continue  # already a boundary edge
-
-                p1 = vertices[v1]
-                p2 = vertices[v2]
-                seg = LineString([p1, p2])
-
-                # Check interior lies strictly within the face
-                mid = Point((p1[0] + p2[0]) * 0.5, (p1[1] + p2[1]) * 0.5)
-                if not inner_poly.contains(mid):
-                    continue
-
-                # Okay, this is a valid chord inside face fi
-                eid = len(edges)
-                edges.append(Edge(v1=v1, v2=v2, delta=0))
-                vertex_edges[v1].append(eid)
-                vertex_edges[v2].append(eid)
-                existing_edge_keys.add(key)
-                face_chord_edges[fi].append(eid)
-
-    if not edges:
+        # Candidate chords (i, j): skip adjacent vertices and the edge that
+        # closes the ring.
+        ii, jj = np.triu_indices(n, k=2)
+        keep = ~((ii == 0) & (jj == n - 1))
+        ii, jj = ii[keep], jj[keep]
+        if len(ii) == 0:
+            continue
+
+        # Chord midpoints must lie strictly inside the slightly eroded face
+        # (the face itself if erosion leaves nothing); tested for all
+        # candidates at once.
+        vid_arr = np.asarray(vids)
+        mid = (coords[vid_arr[ii]] + coords[vid_arr[jj]]) * 0.5
+        inside = shapely.contains_xy(inner_polys[fi], mid[:, 0], mid[:, 1])
+
+        for i, j in zip(ii[inside].tolist(), jj[inside].tolist()):
+            v1 = vids[i]
+            v2 = vids[j]
+            key = (v1 << 32 | v2) if v1 < v2 else (v2 << 32 | v1)
+            if key in existing_edge_keys:
+                continue  # already a boundary edge
+
+            # Okay, this is a valid chord inside face fi
+            eid = add_edge(v1, v2, 0)
+            existing_edge_keys.add(key)
+            face_chord_edges[fi].append(eid)
+
+    if not edge_v1:
         raise RuntimeError("No edges constructed in mesh.")
 
     # --- Boundary vertices: vertices lying on outer heart boundary ---
-    boundary_vertices: Set[int] = set()
     heart_boundary = LineString(heart_outline.exterior.coords)
-    for vid, (x, y) in enumerate(vertices):
-        pt = Point(x, y)
-        if heart_boundary.distance(pt) < 1e-5:
-            boundary_vertices.add(vid)
+    dist = shapely.distance(shapely.points(np.asarray(vertices, dtype=float)), heart_boundary)
+    boundary_vertices: Set[int] = set(np.nonzero(dist < 1e-5)[0].tolist())
 
     if len(boundary_vertices) < 4:
         raise RuntimeError(
@@ -388,41 +607,31 @@ def build_mesh_from_svg(svg_path: str,
         )
 
     # --- Pair up any interior vertices with odd colour-boundary degree ---
+    odd = _delta_degree(edge_v1, edge_v2, edge_delta, len(vertices)) % 2 == 1
     odd_interior = [
-        v for v in range(len(vertices))
+        v for v in np.flatnonzero(odd).tolist()
         if v not in boundary_vertices
-        and sum(1 for e in vertex_edges[v] if edges[e].delta == 1) % 2 == 1
     ]
 
-    edge_lookup: Dict[Tuple[int, int], List[int]] = defaultdict(list)
-    for idx, e in enumerate(edges):
-        key = (e.v1, e.v2) if e.v1 < e.v2 else (e.v2, e.v1)
+    edge_lookup: Dict[int, List[int]] = defaultdict(list)
+    for idx, (a, b) in enumerate(zip(edge_v1, edge_v2)):
+        key = (a << 32 | b) if a < b else (b << 32 | a)
         edge_lookup[key].append(idx)
 
-    def _dist2(a: int, b: int) -> float:
-        ax, ay = vertices[a]
-        bx, by = vertices[b]
-        dx = ax - bx
-        dy = ay - by
-        return dx * dx + dy * dy
-
-    while len(odd_interior) >= 2:
-        v = odd_interior.pop()
-        nearest = min(odd_interior, key=lambda u: _dist2(v, u))
-        odd_interior.remove(nearest)
-        key = (v, nearest) if v < nearest else (nearest, v)
-        eid = len(edges)
-        edges.append(Edge(v1=v, v2=nearest, delta=1))
-        vertex_edges[v].append(eid)
-        vertex_edges[nearest].append(eid)
-        existing_edge_keys.add(key)
-        edge_lookup[key].append(eid)
+    def add_pair_edges(vs: List[int]) -> None:
+        # Minimum-length pairing; each pair gets a delta=1 edge.
+        for a, b in _match_pairs(coords[vs]).tolist():
+            v, nearest = vs[a], vs[b]
+            key = (v << 32 | nearest) if v < nearest else (nearest << 32 | v)
+            eid = add_edge(v, nearest, 1)
+            existing_edge_keys.add(key)
+            edge_lookup[key].append(eid)
+
+    add_pair_edges(odd_interior)
 
     # Pair boundary odd-degree vertices down to four remaining
-    odd_boundary = {
-        v for v in boundary_vertices
-        if sum(1 for e in vertex_edges[v] if edges[e].delta == 1) % 2 == 1
-    }
+    odd = _delta_degree(edge_v1, edge_v2, edge_delta, len(vertices)) % 2 == 1
+    odd_boundary = {v for v in boundary_vertices if odd[v]}
 
     # Target odd vertices on the geometric extremes (left/right/top/bottom)
     pinned = set()
@@ -432,17 +641,7 @@ def build_mesh_from_svg(svg_path: str,
     pinned.add(max(boundary_vertices, key=lambda v: vertices[v][1]))
 
     needs_flip = list((odd_boundary - pinned) | (pinned - odd_boundary))
-    while len(needs_flip) >= 2:
-        v = needs_flip.pop()
-        nearest = min(needs_flip, key=lambda u: _dist2(v, u))
-        needs_flip.remove(nearest)
-        key = (v, nearest) if v < nearest else (nearest, v)
-        eid = len(edges)
-        edges.append(Edge(v1=v, v2=nearest, delta=1))
-        vertex_edges[v].append(eid)
-        vertex_edges[nearest].append(eid)
-        existing_edge_keys.add(key)
-        edge_lookup[key].append(eid)
+    add_pair_edges(needs_flip)
 
     xs = [x for (x, y) in vertices]
     ys = [y for (x, y) in vertices]
@@ -451,33 +650,23 @@ def build_mesh_from_svg(svg_path: str,
 
     # --- Precompute crossing chord pairs (same face only) ---
     crossing_pairs: List[Tuple[int, int]] = []
-
-    # Quick helper to build LineString per edge when needed
-    def edge_segment(eid: int) -> LineString:
-        e = edges[eid]
-        return LineString([vertices[e.v1], vertices[e.v2]])
+    ev1 = np.asarray(edge_v1, dtype=np.int32)
+    ev2 = np.asarray(edge_v2, dtype=np.int32)
 
     for fi, chord_eids in enumerate(face_chord_edges):
-        m = len(chord_eids)
-        for a in range(m):
-            e1 = chord_eids[a]
-            seg1 = edge_segment(e1)
-            for b in range(a + 1, m):
-                e2 = chord_eids[b]
-                seg2 = edge_segment(e2)
-                # chords share no vertex if all endpoints distinct
-                e1v = {edges[e1].v1, edges[e1].v2}
-                e2v = {edges[e2].v1, edges[e2].v2}
-                if e1v & e2v:
-                    continue
-                # Check if they cross in the interior
-                if seg1.crosses(seg2):
-                    crossing_pairs.append((e1, e2))
+        if len(chord_eids) < 2:
+            continue
+        ends = np.column_stack([ev1[chord_eids], ev2[chord_eids]])
+        for a, b in _crossing_segment_pairs(coords[ends[:, 0]], coords[ends[:, 1]], ends):
+            crossing_pairs.append((chord_eids[a], chord_eids[b]))
 
     mesh = Mesh(
-        faces=faces,
+        face_polygons=face_polygons,
+        face_color=np.asarray(face_color, dtype=np.int8),
         vertices=vertices,
-        edges=edges,
+        edge_v1=ev1,
+        edge_v2=ev2,
+        edge_delta=np.asarray(edge_delta, dtype=np.int32),
         vertex_edges=vertex_edges,
         boundary_vertices=boundary_vertices,
         bbox=(minx, miny, maxx, maxy),
@@ -496,10 +685,39 @@ class CutSolution:
     purple_edges: List[int]
 
 
+def _greedy_hint(mesh: Mesh, starts: List[int], goals: List[int]) -> Set[int]:
+    """
+    Greedy yellow cut for warm-starting CP-SAT: the shortest path of
+    colour-boundary edges from any vertex in `starts` to any in `goals`
+    (multi-source BFS). Every other colour-boundary edge is left to purple.
+    Returns the yellow edge ids (empty if no such path exists).
+    """
+    goal_set = set(goals)
+    prev: Dict[int, int] = {v: -1 for v in starts}
+    queue = deque(starts)
+    while queue:
+        v = queue.popleft()
+        if v in goal_set:
+            path: Set[int] = set()
+            while prev[v] >= 0:
+                e = prev[v]
+                path.add(e)
+                v = mesh.edge_v1[e] if mesh.edge_v2[e] == v else mesh.edge_v2[e]
+            return path
+        for e in mesh.vertex_edges[v]:
+            if mesh.edge_delta[e] != 1:
+                continue
+            u = int(mesh.edge_v1[e] if mesh.edge_v2[e] == v else mesh.edge_v2[e])
+            if u not in prev:
+                prev[u] = e
+                queue.append(u)
+    return set()
+
+
 def solve_cuts(mesh: Mesh) -> CutSolution:
     model = cp_model.CpModel()
 
-    num_edges = len(mesh.edges)
+    num_edges = len(mesh.edge_delta)
     num_vertices = len(mesh.vertices)
 
     # y_e, p_e ∈ {0,1}
@@ -507,23 +725,20 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
     p = [model.NewBoolVar(f"p_{e}") for e in range(num_edges)]
 
     double = [None] * num_edges
-    base_cost_terms = []
+    base_cost_terms = y + p
 
-    for e_idx, edge in enumerate(mesh.edges):
-        if edge.delta == 1:
-            # colour boundary: exactly one colour crosses
-            model.Add(y[e_idx] + p[e_idx] == 1)
-        else:
-            # inside same-colour region: either none or both colours
-            model.Add(y[e_idx] == p[e_idx])
-            d = model.NewBoolVar(f"dbl_{e_idx}")
-            model.Add(d <= y[e_idx])
-            model.Add(d <= p[e_idx])
-            model.Add(d >= y[e_idx] + p[e_idx] - 1)
-            double[e_idx] = d
+    # colour boundary: exactly one colour crosses
+    for e_idx in np.flatnonzero(mesh.edge_delta == 1).tolist():
+        model.Add(y[e_idx] + p[e_idx] == 1)
 
-        base_cost_terms.append(y[e_idx])
-        base_cost_terms.append(p[e_idx])
+    # inside same-colour region: either none or both colours
+    for e_idx in np.flatnonzero(mesh.edge_delta == 0).tolist():
+        model.Add(y[e_idx] == p[e_idx])
+        d = model.NewBoolVar(f"dbl_{e_idx}")
+        model.Add(d <= y[e_idx])
+        model.Add(d <= p[e_idx])
+        model.Add(d >= y[e_idx] + p[e_idx] - 1)
+        double[e_idx] = d
 
     # Degrees and endpoints
     degY = []
@@ -550,21 +765,22 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
         is_epP.append(epP)
 
         if v in boundary_vertices:
-            even_vals = [d for d in range(0, max_deg + 1) if d % 2 == 0]
-            allowed_y = [(1, 1)] + [(d, 0) for d in even_vals if d != 1]
-            allowed_p = [(1, 1)] + [(d, 0) for d in even_vals if d != 1]
-            model.AddAllowedAssignments([dY, epY], allowed_y)
-            model.AddAllowedAssignments([dP, epP], allowed_p)
+            # Endpoint iff degree is 1, otherwise the degree is even:
+            # deg = 2 * half + ep, with half forced to 0 at an endpoint.
+            halfY = model.NewIntVar(0, max_deg // 2, f"halfY_{v}")
+            halfP = model.NewIntVar(0, max_deg // 2, f"halfP_{v}")
+            model.Add(dY == 2 * halfY + epY)
+            model.Add(dP == 2 * halfP + epP)
+            model.Add(halfY == 0).OnlyEnforceIf(epY)
+            model.Add(halfP == 0).OnlyEnforceIf(epP)
         else:
             model.Add(epY == 0)
             model.Add(epP == 0)
             model.AddModuloEquality(0, dY, 2)
             model.AddModuloEquality(0, dP, 2)
 
-    odd_boundary = [
-        v for v in boundary_list
-        if sum(1 for e in mesh.vertex_edges[v] if mesh.edges[e].delta == 1) % 2 == 1
-    ]
+    odd = _delta_degree(mesh.edge_v1, mesh.edge_v2, mesh.edge_delta, num_vertices) % 2 == 1
+    odd_boundary = [v for v in boundary_list if odd[v]]
     num_endpoints = max(2, len(odd_boundary) // 2)
     # Exactly num_endpoints endpoints per colour
     model.Add(sum(is_epY[v] for v in boundary_list) == num_endpoints)
@@ -600,6 +816,17 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
         model.Add(y[e1] + y[e2] <= 1)
         model.Add(p[e1] + p[e2] <= 1)
 
+    # Warm start: yellow on a shortest left -> right colour-boundary path
+    # (between odd vertices where possible), purple on the remaining
+    # colour-boundary edges, same-colour edges and chords unused.
+    odd_left = [v for v in left if odd[v]] or left
+    odd_right = [v for v in right if odd[v]] or right
+    hint_yellow = _greedy_hint(mesh, odd_left, odd_right)
+    for e in range(num_edges):
+        boundary_edge = mesh.edge_delta[e] == 1
+        model.AddHint(y[e], e in hint_yellow)
+        model.AddHint(p[e], boundary_edge and e not in hint_yellow)
+
     # Objective: minimise number of double edges and overall used edges
     double_terms = [d for d in double if d is not None]
 
@@ -631,11 +858,12 @@ def solve_cuts(mesh: Mesh) -> CutSolution:
 # SVG output
 # ---------------------------------------------------------------------------
 
-def write_svg_with_cuts(input_svg: str,
+def write_svg_with_cuts(input_svg: Union[str, ET.ElementTree],
                         output_svg: str,
                         mesh: Mesh,
                         sol: CutSolution) -> None:
-    tree = ET.parse(input_svg)
+    # A passed-in tree gets the cuts group appended in place.
+    tree = _as_tree(input_svg)
     root = tree.getroot()
 
     tag = root.tag
@@ -644,46 +872,25 @@ def write_svg_with_cuts(input_svg: str,
     else:
         ns = None
 
-    def mk(tag_name: str, attrib: Dict[str, str]):
-        if ns:
-            return ET.Element(f"{{{ns}}}{tag_name}", attrib)
-        else:
-            return ET.Element(tag_name, attrib)
-
-    cuts_group = mk("g", {"id": "julehjerte_cuts"})
+    # Serialize the lines as one string and parse it once, rather than
+    # building an ET.Element per cut edge. The xmlns attribute puts the
+    # parsed elements in the document's namespace.
+    xmlns = f' xmlns="{ns}"' if ns else ""
+    parts = [f'<g id="julehjerte_cuts"{xmlns}>']
 
     # Draw yellow then purple on top
-    for eidx in sol.yellow_edges:
-        edge = mesh.edges[eidx]
-        x1, y1 = mesh.vertices[edge.v1]
-        x2, y2 = mesh.vertices[edge.v2]
-        line = mk("line", {
-            "x1": str(x1),
-            "y1": str(y1),
-            "x2": str(x2),
-            "y2": str(y2),
-            "stroke": "gold",
-            "stroke-width": "1.8",
-            "fill": "none",
-            "stroke-linecap": "round",
-        })
-        cuts_group.append(line)
-
-    for eidx in sol.purple_edges:
-        edge = mesh.edges[eidx]
-        x1, y1 = mesh.vertices[edge.v1]
-        x2, y2 = mesh.vertices[edge.v2]
-        line = mk("line", {
-            "x1": str(x1),
-            "y1": str(y1),
-            "x2": str(x2),
-            "y2": str(y2),
-            "stroke": "violet",
-            "stroke-width": "1.2",
-            "fill": "none",
-            "stroke-linecap": "round",
-        })
-        cuts_group.append(line)
+    for edges, stroke, width in ((sol.yellow_edges, "gold", "1.8"),
+                                 (sol.purple_edges, "violet", "1.2")):
+        for eidx in edges:
+            x1, y1 = mesh.vertices[mesh.edge_v1[eidx]]
+            x2, y2 = mesh.vertices[mesh.edge_v2[eidx]]
+            parts.append(
+                f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" '
+                f'stroke="{stroke}" stroke-width="{width}" fill="none" '
+                f'stroke-linecap="round"/>'
+            )
+    parts.append("</g>")
+    cuts_group = ET.fromstring("".join(parts))
 
     root.append(cuts_group)
     tree.write(output_svg, encoding="utf-8", xml_declaration=True)
@@ -702,9 +909,10 @@ def main():
     parser.add_argument("output_svg", help="Output SVG with cut lines overlaid")
     args = parser.parse_args()
 
-    mesh = build_mesh_from_svg(args.input_svg)
+    tree = ET.parse(args.input_svg)
+    mesh = build_mesh_from_svg(tree)
     sol = solve_cuts(mesh)
-    write_svg_with_cuts(args.input_svg, args.output_svg, mesh, sol)
+    write_svg_with_cuts(tree, args.output_svg, mesh, sol)
 
 
 if __name__ == "__main__":
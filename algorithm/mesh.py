@@ -16,16 +16,20 @@ Usage:
     python svg_to_mesh.py input.svg overlay.svg
 
 Dependencies:
-    pip install shapely svgelements
+    pip install shapely svgelements numpy
 """
 
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional, Set, TYPE_CHECKING
 from collections import defaultdict
+import os
+import re
 import sys
-import xml.etree.ElementTree as ET
-from math import hypot
+from concurrent.futures import ProcessPoolExecutor
+from math import hypot, sqrt
 
+import numpy as np
+import shapely
 from shapely.geometry import (
     Polygon,
     MultiPolygon,
@@ -37,6 +41,12 @@ from shapely.geometry import (
     MultiPoint,
 )
 from shapely.ops import unary_union, polygonize
+from shapely.strtree import STRtree
+
+try:  # segment classes, for the per-segment helpers (parsers import the rest)
+    from svgelements import Linear  # type: ignore
+except ImportError:
+    Linear = None
 
 if TYPE_CHECKING:
     from svgelements import SVG, Path, Shape  # type: ignore
@@ -63,38 +73,108 @@ def iter_polygons(geom):
         raise TypeError(f"Unexpected geometry type {type(geom)}")
 
 
-def path_to_polygon(path: "Path",
-                    max_segment_len: float = 1.0) -> Polygon:
+def ensure_valid(geom):
     """
-    Approximate an SVG Path as a Polygon by sampling along each segment.
+    Return geom unchanged when valid (e.g. a union of valid polygons),
+    otherwise repair it into polygons only. Skips the full rebuild that
+    buffer(0) does on every call.
+    """
+    if geom.is_valid:
+        return geom
+    try:
+        return shapely.make_valid(geom, method="structure", keep_collapsed=False)
+    except TypeError:
+        # Shapely < 2.1: the default repair may also return collapsed lines
+        # and points, so keep only the polygonal parts.
+        parts = shapely.get_parts(shapely.make_valid(geom))
+        return unary_union(parts[shapely.get_dimensions(parts) == 2])
+
+
+def sample_segment(seg, t: np.ndarray) -> np.ndarray:
+    """
+    Evaluate a path segment at parameters t, returning an (n, 2) array.
+
+    svgelements' npoint evaluates lines, Beziers and arcs on the whole array
+    at once; seg.point is npoint on a single value, so samples are
+    bit-identical to it. Segments without a NumPy path (e.g. Move) return a
+    list of Points, converted here.
+    """
+    xy = seg.npoint(t)
+    if isinstance(xy, np.ndarray):
+        return xy
+    return np.array([(pt.x, pt.y) for pt in xy], dtype=float)
+
+
+def segment_length(seg) -> float:
+    """
+    Length of a path segment, for choosing its sample count.
+
+    Lines (and Close) use the endpoint distance directly, computed exactly
+    as svgelements does; curves use a coarse 0.1 tolerance, as the length
+    only needs to be good to a fraction of max_segment_len.
+    """
+    if isinstance(seg, Linear):
+        if seg.start is None or seg.end is None:
+            return 0.0
+        dx = seg.end[0] - seg.start[0]
+        dy = seg.end[1] - seg.start[1]
+        return sqrt(dx * dx + dy * dy)
+    return seg.length(error=1e-1)
+
+
+def path_points(path: "Path",
+                max_segment_len: float = 1.0) -> np.ndarray:
+    """
+    Sample an SVG Path into an (n, 2) ring of points.
 
     max_segment_len controls sampling density in user units.
     """
-    pts: List[Tuple[float, float]] = []
+    chunks: List[np.ndarray] = []
 
     for seg in path:
         try:
-            seg_len = seg.length(error=1e-2)
+            seg_len = segment_length(seg)
         except Exception:
             seg_len = 1.0
         n = max(2, int(seg_len / max_segment_len))
 
-        for i in range(n):
-            t = i / float(n)
-            z = seg.point(t)
-            pts.append((z.real, z.imag))
+        chunks.append(sample_segment(seg, np.arange(n) / float(n)))
 
     if len(path) > 0:
         z = path[-1].end
-        pts.append((z.real, z.imag))
+        chunks.append(np.array([[z.real, z.imag]], dtype=float))
 
+    pts = np.concatenate(chunks) if chunks else np.empty((0, 2))
     if len(pts) < 3:
         raise ValueError("Path too short to form a polygon")
+    return pts
+
+
+def rings_to_polygons(rings: List[np.ndarray]) -> List[Polygon]:
+    """
+    Build and clean polygons for many sampled rings at once: one packed
+    coordinate buffer through shapely.linearrings / polygons / buffer(0).
+    Where cleaning splits a ring, the largest piece is kept.
+    """
+    if not rings:
+        return []
+    coords = np.concatenate(rings)
+    indices = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+    polys = shapely.buffer(
+        shapely.polygons(shapely.linearrings(coords, indices=indices)), 0)
+    return [max(iter_polygons(p), key=lambda q: q.area)
+            if isinstance(p, MultiPolygon) else p
+            for p in polys.tolist()]
+
+
+def path_to_polygon(path: "Path",
+                    max_segment_len: float = 1.0) -> Polygon:
+    """
+    Approximate an SVG Path as a Polygon by sampling along each segment.
 
-    poly = Polygon(pts).buffer(0)  # clean topology
-    if isinstance(poly, MultiPolygon):
-        poly = max(iter_polygons(poly), key=lambda p: p.area)
-    return poly
+    max_segment_len controls sampling density in user units.
+    """
+    return rings_to_polygons([path_points(path, max_segment_len)])[0]
 
 
 # ----------------------------------------------------------------------
@@ -126,6 +206,9 @@ class Mesh:
     edges: List[Edge]
     vertex_edges: List[List[int]]  # for each vertex, list of incident edge ids
     boundary_vertices: Set[int]
+    # Visible polygons of the two main colours (before gap cleaning), kept
+    # by svg_to_mesh so find_root_nodes needn't re-parse the SVG.
+    visible_regions: Optional[Tuple[List[Polygon], List[Polygon]]] = None
 
 
 # ----------------------------------------------------------------------
@@ -136,26 +219,34 @@ def find_root_nodes(mesh: Mesh,
                     snap_tol: float = 1e-3,
                     merge_tol: Optional[float] = None,
                     svg_path: Optional[str] = None,
-                    max_segment_len: float = 1.0) -> List[Tuple[float, float]]:
+                    max_segment_len: float = 1.0,
+                    visible_regions: Optional[Tuple[List[Polygon], List[Polygon]]] = None,
+                    ) -> List[Tuple[float, float]]:
     """
     Root nodes: points along the outer bounding box where the visible colour
     switches between the two main fills. Computed by intersecting each colour
     union with the rectangle perimeter and taking segment endpoints.
+
+    The colour regions come from visible_regions if given (e.g.
+    mesh.visible_regions from svg_to_mesh), else from parsing svg_path,
+    else from the mesh faces.
     """
     if merge_tol is None:
         merge_tol = snap_tol * 2
 
-    if svg_path:
+    if visible_regions is None and svg_path:
         shapes = parse_svg_shapes(svg_path, max_segment_len=max_segment_len)
         c0, c1 = pick_two_main_colours(shapes)
-        vis0, vis1 = compute_visible_regions(shapes, c0, c1)
-        col0_union = unary_union(vis0).buffer(0)
-        col1_union = unary_union(vis1).buffer(0)
-        heart_geom = unary_union([col0_union, col1_union]).buffer(0)
+        visible_regions = compute_visible_regions(shapes, c0, c1)
+
+    if visible_regions is not None:
+        vis0, vis1 = visible_regions
+        col0_union = ensure_valid(unary_union(vis0))
+        col1_union = ensure_valid(unary_union(vis1))
     else:
-        col0_union = unary_union([f.polygon for f in mesh.faces if f.color == 0]).buffer(0)
-        col1_union = unary_union([f.polygon for f in mesh.faces if f.color == 1]).buffer(0)
-        heart_geom = unary_union([col0_union, col1_union]).buffer(0)
+        col0_union = ensure_valid(unary_union([f.polygon for f in mesh.faces if f.color == 0]))
+        col1_union = ensure_valid(unary_union([f.polygon for f in mesh.faces if f.color == 1]))
+    heart_geom = ensure_valid(unary_union([col0_union, col1_union]))
 
     # Use the largest polygon outline to measure perimeter distance.
     poly = None
@@ -204,52 +295,48 @@ def find_root_nodes(mesh: Mesh,
         return [mesh.vertices[v] for v, d in deg.items()
                 if d == 1 and v in mesh.boundary_vertices]
 
-    # Deduplicate distances
-    snap_dists = []
-    for d in dists:
-        qd = round(d / snap_tol) * snap_tol
-        if all(abs(qd - od) > merge_tol for od in snap_dists):
-            snap_dists.append(qd)
-
-    snap_dists.extend([0.0, perim_len])
-    snap_dists = sorted(set(snap_dists))
+    # Deduplicate distances: quantise, sort, and drop any value within
+    # merge_tol of its predecessor.
+    snapped = np.sort(np.round(np.asarray(dists) / snap_tol) * snap_tol)
+    keep = np.concatenate(([True], np.diff(snapped) > merge_tol))
+    snap_arr = np.unique(np.concatenate((snapped[keep], [0.0, perim_len])))
 
-    # Walk intervals and detect colour changes
-    roots_dists: List[float] = []
+    # Walk intervals and detect colour changes: classify every interval
+    # midpoint against the (prepared) dilated colour-0 union in one call,
+    # then a root sits at the start of each interval whose colour differs
+    # from its predecessor's.
     col0_prep = col0_union.buffer(snap_tol * 5)
-    current_color = None
-    for i in range(len(snap_dists) - 1):
-        mid = (snap_dists[i] + snap_dists[i + 1]) / 2.0
-        mid_pt = bbox_perim.interpolate(mid % perim_len)
-        inside0 = col0_prep.contains(mid_pt)
-        color = 0 if inside0 else 1
-        if current_color is None:
-            current_color = color
-        elif color != current_color:
-            roots_dists.append(snap_dists[i])
-            current_color = color
-
-    final_pts: List[Tuple[float, float]] = []
-    for d in roots_dists:
-        px, py = bbox_perim.interpolate(d % perim_len).coords[0]
-        final_pts.append((px, py))
+    shapely.prepare(col0_prep)
+    mids = (snap_arr[:-1] + snap_arr[1:]) / 2.0
+    mid_pts = shapely.line_interpolate_point(bbox_perim, mids % perim_len)
+    inside0 = shapely.contains(col0_prep, mid_pts)
+    changes = np.flatnonzero(inside0[1:] != inside0[:-1]) + 1
+    roots_dists = snap_arr[changes]
+
+    root_pts = shapely.line_interpolate_point(bbox_perim, roots_dists % perim_len)
+    final_pts: List[Tuple[float, float]] = [
+        (px, py) for px, py in shapely.get_coordinates(root_pts).tolist()
+    ]
 
     return final_pts
 
-    # Fallback: boundary vertices that see exactly one colour-change edge.
-    deg = defaultdict(int)
-    for e in mesh.edges:
-        if e.delta == 1:
-            deg[e.v1] += 1
-            deg[e.v2] += 1
-    return [mesh.vertices[v] for v, d in deg.items()
-            if d == 1 and v in mesh.boundary_vertices]
-
 
 # ----------------------------------------------------------------------
 # Step 1: Parse SVG into (polygon, fill, z_index)
 # ----------------------------------------------------------------------
 
+# Below this many shapes, process start-up costs more than it saves.
+PARALLEL_MIN_SHAPES = 200
+
+
+def _sample_shape(path: "Path", max_segment_len: float) -> Optional[np.ndarray]:
+    """path_points for a pool worker; None if the path can't be sampled."""
+    try:
+        return path_points(path, max_segment_len=max_segment_len)
+    except Exception:
+        return None
+
+
 def parse_svg_shapes(svg_path: str,
                      max_segment_len: float = 1.0):
     """
@@ -265,6 +352,9 @@ def parse_svg_shapes(svg_path: str,
             inv_viewbox = ~Matrix(svg.viewbox_transform)
         except Exception:
             inv_viewbox = None
+        if inv_viewbox is not None and inv_viewbox.is_identity():
+            inv_viewbox = None
+    jobs = []
     shapes = []
 
     for z, elem in enumerate(svg.elements()):
@@ -287,22 +377,40 @@ def parse_svg_shapes(svg_path: str,
 
         # Realise element transforms, and map viewport coords back into
         # viewBox units so geometry matches the SVG coordinate system.
+        # Identity transforms are skipped rather than walked. The two
+        # matrices are applied one after the other, not composed: the
+        # product differs in the last bits, and vertex snapping downstream
+        # is sensitive to that.
         try:
-            path.reify()
+            if not path.transform.is_identity():
+                path.reify()
             if inv_viewbox is not None:
                 path *= inv_viewbox
                 path.reify()
         except Exception:
             continue
 
-        try:
-            poly = path_to_polygon(path, max_segment_len=max_segment_len)
-        except Exception:
-            continue
+        jobs.append((path, fill_str, z))
+
+    # Sampling is independent per shape; large documents spread it over a
+    # process pool (svgelements Paths and ndarrays both pickle).
+    paths = [path for path, _, _ in jobs]
+    lens = [max_segment_len] * len(jobs)
+    workers = os.cpu_count() or 1
+    if len(jobs) >= PARALLEL_MIN_SHAPES and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rings = list(pool.map(_sample_shape, paths, lens,
+                                  chunksize=max(1, len(jobs) // (4 * workers))))
+    else:
+        rings = list(map(_sample_shape, paths, lens))
 
+    # Polygons for all sampled shapes are then built in one batch.
+    sampled = [i for i, ring in enumerate(rings) if ring is not None]
+    polys = rings_to_polygons([rings[i] for i in sampled])
+    for i, poly in zip(sampled, polys):
         if poly.area <= 0:
             continue
-
+        _, fill_str, z = jobs[i]
         shapes.append((poly, fill_str, z))
 
     if not shapes:
@@ -348,12 +456,28 @@ def compute_visible_regions(shapes,
         raise RuntimeError("No shapes with the two main colours found.")
 
     filtered.sort(key=lambda t: t[2])  # by DOM order
-    covered = GeometryCollection()
     visible0 = []
     visible1 = []
 
+    # Covered area is kept as the visible shards seen so far, indexed by an
+    # STRtree, so each shape is only differenced against the shards whose
+    # bounding boxes meet it. Shards added since the last tree build are
+    # checked directly; the tree is rebuilt once that backlog exceeds
+    # sqrt(#shards). The visible area equals that of a running union, but
+    # noding differs: zero-width spikes and sliver holes a running union can
+    # leave (and which find_root_nodes reads as spurious colour changes)
+    # may come out differently.
+    shards: List[Polygon] = []
+    tree = STRtree(shards)
+    indexed = 0
+
     for poly, fill, _ in reversed(filtered):  # from top to bottom
-        visible_part = poly.difference(covered)
+        candidates = [shards[i] for i in tree.query(poly)]
+        candidates += shards[indexed:]
+        if candidates:
+            visible_part = poly.difference(unary_union(candidates))
+        else:
+            visible_part = poly
         if visible_part.is_empty:
             continue
 
@@ -362,7 +486,10 @@ def compute_visible_regions(shapes,
         else:
             visible1.append(visible_part)
 
-        covered = unary_union([covered, visible_part])
+        shards.extend(iter_polygons(visible_part))
+        if (len(shards) - indexed) ** 2 > len(shards):
+            tree = STRtree(shards)
+            indexed = len(shards)
 
     if not visible0 or not visible1:
         raise RuntimeError("One of the two colours has no visible area.")
@@ -387,61 +514,60 @@ def build_faces_from_visible_regions(visible0, visible1,
     def clean(geom):
         # Dilate then erode to close sub-gap_tol holes/slivers, while keeping
         # the outline nearly unchanged.
+        # Buffer output (and a union of valid polygons) is already valid.
         if gap_tol and gap_tol > 0:
-            return geom.buffer(gap_tol).buffer(-gap_tol).buffer(0)
-        return geom.buffer(0)
+            return geom.buffer(gap_tol).buffer(-gap_tol)
+        return geom
 
     col0_union = clean(unary_union(visible0))
     col1_union = clean(unary_union(visible1))
-    heart_union = clean(unary_union([col0_union, col1_union]))
-
-    lines = []
-    for geom in [col0_union, col1_union]:
-        for poly in iter_polygons(geom):
-            lines.append(LinearRing(poly.exterior.coords))
-            for ring in poly.interiors:
-                lines.append(LinearRing(ring.coords))
 
-    merged_lines = unary_union(lines)
+    # Both colours' rings (exteriors and holes) in one bulk boundary call,
+    # noded by a single union.
+    colour_geoms = np.array([col0_union, col1_union], dtype=object)
+    merged_lines = shapely.unary_union(shapely.boundary(colour_geoms))
     raw_faces = list(polygonize(merged_lines))
 
-    vertex_map: Dict[Tuple[float, float], int] = {}
-    vertices: List[Tuple[float, float]] = []
-
-    def quantise(pt: Tuple[float, float]) -> Tuple[float, float]:
-        x, y = pt
-        return (round(x / snap_tol) * snap_tol,
-                round(y / snap_tol) * snap_tol)
-
-    def get_vid(pt: Tuple[float, float]) -> int:
-        key = quantise(pt)
-        if key not in vertex_map:
-            vertex_map[key] = len(vertices)
-            vertices.append(key)
-        return vertex_map[key]
+    # Classify all faces at once: every face's representative point is
+    # tested against each prepared colour union in one vectorised call
+    # (intersects_xy counts the boundary, like covers). A point covered by
+    # neither colour lies outside the heart and is dropped.
+    reps = shapely.point_on_surface(np.array(raw_faces, dtype=object))
+    rep_x, rep_y = shapely.get_coordinates(reps).T
+    face_colour = np.full(len(raw_faces), -1, dtype=np.int8)
+    for colour, geom in ((1, col1_union), (0, col0_union)):
+        shapely.prepare(geom)
+        face_colour[shapely.intersects_xy(geom, rep_x, rep_y)] = colour
+
+    kept = np.flatnonzero(face_colour >= 0)
+    if len(kept) == 0:
+        return [], []
+
+    # Global vertex map: all ring points are snapped to the snap_tol grid
+    # and deduplicated in one np.unique pass; ids are renumbered by first
+    # occurrence so vertex order matches the order faces visit them.
+    exteriors = shapely.get_exterior_ring(np.array(raw_faces, dtype=object)[kept])
+    ring_pts, ring_idx = shapely.get_coordinates(exteriors, return_index=True)
+    ring_len = np.bincount(ring_idx, minlength=len(kept))
+    is_closing = np.zeros(len(ring_pts), dtype=bool)
+    is_closing[np.cumsum(ring_len) - 1] = True  # drop closing point
+    q = np.round(ring_pts[~is_closing] / snap_tol).astype(np.int64)
+    uniq, first, inv = np.unique(q, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    vertices: List[Tuple[float, float]] = [
+        (x, y) for x, y in (uniq[order] * snap_tol).tolist()
+    ]
+    ring_vids = np.split(rank[inv.ravel()], np.cumsum(ring_len - 1)[:-1])
 
     faces: List[Face] = []
-
-    for poly in raw_faces:
-        rep = poly.representative_point()
-        if not heart_union.buffer(1e-9).contains(rep):
-            continue
-
-        if col0_union.buffer(1e-9).contains(rep):
-            colour = 0
-        elif col1_union.buffer(1e-9).contains(rep):
-            colour = 1
-        else:
-            continue
-
-        coords = list(poly.exterior.coords)[:-1]
-        b_verts = [get_vid((x, y)) for (x, y) in coords]
-
+    for fi, b_verts in zip(kept.tolist(), ring_vids):
         face_id = len(faces)
         faces.append(Face(id=face_id,
-                          color=colour,
-                          polygon=poly,
-                          boundary=b_verts))
+                          color=int(face_colour[fi]),
+                          polygon=raw_faces[fi],
+                          boundary=b_verts.tolist()))
 
     return faces, vertices
 
@@ -452,48 +578,65 @@ def build_faces_from_visible_regions(visible0, visible1,
 
 def build_edges(faces: List[Face],
                 vertices: List[Tuple[float, float]]) -> Mesh:
-    edge_map: Dict[Tuple[int, int], Dict] = {}
-    vertex_edges: List[List[int]] = [[] for _ in range(len(vertices))]
-
-    for face in faces:
-        b = face.boundary
-        n = len(b)
-        for i in range(n):
-            a = b[i]
-            c = b[(i + 1) % n]
-            if a == c:
-                continue
-            key = (a, c) if a < c else (c, a)
-            ed = edge_map.get(key)
-            if ed is None:
-                ed = {"v1": key[0], "v2": key[1], "faces": [face.id]}
-                edge_map[key] = ed
-            else:
-                ed["faces"].append(face.id)
+    # All half-edges (a -> next vertex on the same face boundary) at once,
+    # keyed by their packed sorted vertex pair; np.unique then gives each
+    # undirected edge, its face count and, renumbered by first occurrence,
+    # the same edge ids the face-by-face scan would assign.
+    bounds = [np.asarray(face.boundary, dtype=np.int64) for face in faces]
+    if bounds:
+        half_a = np.concatenate(bounds)
+        half_c = np.concatenate([np.roll(b, -1) for b in bounds])
+        face_of = np.repeat(np.arange(len(faces)), [len(b) for b in bounds])
+    else:
+        half_a = half_c = face_of = np.empty(0, dtype=np.int64)
+    proper = half_a != half_c
+    half_a, half_c, face_of = half_a[proper], half_c[proper], face_of[proper]
+    keys = (np.minimum(half_a, half_c) << 32) | np.maximum(half_a, half_c)
+
+    uniq, first, inv, counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    edge_of = rank[inv.ravel()]
+
+    edge_keys = uniq[order]
+    edge_counts = counts[order]
+    edge_v1 = (edge_keys >> 32).tolist()
+    edge_v2 = (edge_keys & 0xFFFFFFFF).tolist()
+
+    # First and second face of each edge, in half-edge order.
+    by_edge = np.argsort(edge_of, kind="stable")
+    starts = np.cumsum(edge_counts) - edge_counts
+    second = np.minimum(starts + 1, len(by_edge) - 1)
+    edge_f1 = face_of[by_edge[starts]].tolist()
+    edge_f2 = np.where(edge_counts > 1, face_of[by_edge[second]], -1).tolist()
+    face_colour = np.array([face.color for face in faces], dtype=np.int8)
 
     edges: List[Edge] = []
-    boundary_vertices: Set[int] = set()
-
-    for key, ed in edge_map.items():
-        v1, v2 = ed["v1"], ed["v2"]
-        flist = ed["faces"]
-
-        if len(flist) == 1:
-            f1, f2 = flist[0], None
+    for eid, (v1, v2, f1, f2) in enumerate(zip(edge_v1, edge_v2, edge_f1, edge_f2)):
+        if f2 < 0:
+            f2 = None
             delta = 0
-            boundary_vertices.add(v1)
-            boundary_vertices.add(v2)
         else:
-            f1, f2 = flist[0], flist[1]
-            c1 = faces[f1].color
-            c2 = faces[f2].color
-            delta = 1 if c1 != c2 else 0
-
-        eid = len(edges)
+            delta = 1 if face_colour[f1] != face_colour[f2] else 0
         edges.append(Edge(id=eid, v1=v1, v2=v2,
                           f1=f1, f2=f2, delta=delta))
-        vertex_edges[v1].append(eid)
-        vertex_edges[v2].append(eid)
+
+    # Edges seen by a single face lie on the outer boundary.
+    open_keys = edge_keys[edge_counts == 1]
+    boundary_vertices: Set[int] = set(
+        np.unique(np.concatenate((open_keys >> 32, open_keys & 0xFFFFFFFF))).tolist()
+    )
+
+    # Incident edges per vertex, in increasing edge id.
+    inc_v = np.concatenate((edge_v1, edge_v2)).astype(np.int64)
+    inc_e = np.tile(np.arange(len(edges)), 2)
+    inc = np.lexsort((inc_e, inc_v))
+    splits = np.cumsum(np.bincount(inc_v, minlength=len(vertices)))[:-1]
+    vertex_edges: List[List[int]] = [
+        chunk.tolist() for chunk in np.split(inc_e[inc], splits)
+    ] if vertices else []
 
     mesh = Mesh(
         vertices=vertices,
@@ -520,6 +663,7 @@ def svg_to_mesh(svg_path: str,
         visible0, visible1, snap_tol=snap_tol, gap_tol=gap_tol
     )
     mesh = build_edges(faces, vertices)
+    mesh.visible_regions = (visible0, visible1)
     return mesh
 
 
@@ -527,6 +671,57 @@ def svg_to_mesh(svg_path: str,
 # SVG overlay writer
 # ----------------------------------------------------------------------
 
+# Markup that may contain a literal "</svg>" (comments, CDATA, processing
+# instructions) is matched as a whole token, so only real close tags hit the
+# last alternative; group 1 is the close tag's namespace prefix.
+_SVG_CLOSE_RE = re.compile(
+    rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|</((?:[\w.-]+:)?)svg\s*>",
+    re.DOTALL,
+)
+
+# Edges whose endpoints are gathered per ndarray block in the overlay writer.
+_OVERLAY_BLOCK = 4096
+
+
+def _root_close_tag(data: bytes) -> Optional["re.Match[bytes]"]:
+    """The last </svg> close tag in data outside comments, CDATA and PIs."""
+    close = None
+    for m in _SVG_CLOSE_RE.finditer(data):
+        if m.group(0).startswith(b"</"):
+            close = m
+    return close
+
+
+def _overlay_elements(mesh: Mesh,
+                      prefix: str,
+                      stroke_width: float,
+                      root_nodes: Optional[List[Tuple[float, float]]],
+                      root_radius: float):
+    """Yield the overlay group's markup piece by piece."""
+    yield f'<{prefix}g id="mesh_edges">'
+
+    # Endpoint coordinates are gathered one ndarray block at a time, so
+    # memory stays bounded by the block rather than the edge count.
+    verts = np.asarray(mesh.vertices, dtype=float).reshape(-1, 2)
+    for start in range(0, len(mesh.edges), _OVERLAY_BLOCK):
+        block = mesh.edges[start:start + _OVERLAY_BLOCK]
+        ends = np.array([(e.v1, e.v2) for e in block], dtype=np.int64)
+        for x1, y1, x2, y2 in verts[ends].reshape(-1, 4).tolist():
+            yield (
+                f'<{prefix}line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" '
+                f'stroke="black" stroke-width="{stroke_width}" fill="none" '
+                f'stroke-linecap="round" />'
+            )
+
+    for x, y in root_nodes or ():
+        yield (
+            f'<{prefix}circle cx="{x}" cy="{y}" r="{root_radius}" '
+            f'stroke="lime" stroke-width="{stroke_width * 1.5}" fill="none" />'
+        )
+
+    yield f"</{prefix}g>"
+
+
 def write_mesh_overlay_svg(input_svg: str,
                            output_svg: str,
                            mesh: Mesh,
@@ -537,52 +732,25 @@ def write_mesh_overlay_svg(input_svg: str,
     Take the original SVG, overlay all mesh edges as black lines, and write
     the result to output_svg.
     """
-    tree = ET.parse(input_svg)
-    root = tree.getroot()
-
-    tag = root.tag
-    if tag.startswith("{"):
-        ns = tag[1:].split("}")[0]
-    else:
-        ns = None
-
-    def mk(tag_name: str, attrib: Dict[str, str]):
-        if ns:
-            return ET.Element(f"{{{ns}}}{tag_name}", attrib)
-        else:
-            return ET.Element(tag_name, attrib)
-
-    g = mk("g", {"id": "mesh_edges"})
-
-    for edge in mesh.edges:
-        x1, y1 = mesh.vertices[edge.v1]
-        x2, y2 = mesh.vertices[edge.v2]
-        line = mk("line", {
-            "x1": str(x1),
-            "y1": str(y1),
-            "x2": str(x2),
-            "y2": str(y2),
-            "stroke": "black",
-            "stroke-width": str(stroke_width),
-            "fill": "none",
-            "stroke-linecap": "round",
-        })
-        g.append(line)
-
-    if root_nodes:
-        for x, y in root_nodes:
-            circ = mk("circle", {
-                "cx": str(x),
-                "cy": str(y),
-                "r": str(root_radius),
-                "stroke": "lime",
-                "stroke-width": str(stroke_width * 1.5),
-                "fill": "none",
-            })
-            g.append(circ)
-
-    root.append(g)
-    tree.write(output_svg, encoding="utf-8", xml_declaration=True)
+    with open(input_svg, "rb") as f:
+        data = f.read()
+
+    # Splice the overlay in front of the root's closing tag, streaming the
+    # elements out as preformatted text instead of building an Element per
+    # edge. An svg:-prefixed root gets prefixed overlay tags to match.
+    close = _root_close_tag(data)
+    if close is None:
+        raise ValueError(f"No closing </svg> tag found in {input_svg}")
+    prefix = (close.group(1) or b"").decode("ascii")
+
+    with open(output_svg, "wb") as out:
+        out.write(data[:close.start()])
+        out.writelines(
+            piece.encode()
+            for piece in _overlay_elements(mesh, prefix, stroke_width,
+                                           root_nodes, root_radius)
+        )
+        out.write(data[close.start():])
 
 
 # ----------------------------------------------------------------------
@@ -605,8 +773,8 @@ def main():
     print(f"Edges:    {len(mesh.edges)}")
     print(f"Boundary vertices: {len(mesh.boundary_vertices)}")
 
-    roots = find_root_nodes(mesh, snap_tol=snap_tol, svg_path=input_svg,
-                            max_segment_len=0.5)
+    roots = find_root_nodes(mesh, snap_tol=snap_tol,
+                            visible_regions=mesh.visible_regions)
 
     write_mesh_overlay_svg(input_svg, output_svg, mesh, stroke_width=0.25)
     if roots_svg:
@@ -0,0 +1,32 @@
+"""
+Path sampling in julehjerte_cuts.
+
+Run with:
+    python -m pytest algorithm/test_julehjerte_cuts.py
+"""
+
+import pytest
+from svgpathtools import parse_path
+
+import julehjerte_cuts as jc
+
+
+def test_multi_subpath_keeps_every_corner():
+    # Two squares touching at a corner (static/favicon.svg); each subpath is
+    # its own ring, so no corner is lost and no jump edge joins them.
+    path = parse_path("M 300 225 L 375 225 L 375 300 L 300 300 Z "
+                      "M 225 300 L 300 300 L 300 375 L 225 375 Z")
+    polys = jc._path_to_polygons(path)
+
+    assert sorted(p.area for p in polys) == pytest.approx([5625.0, 5625.0])
+    assert sorted(p.bounds for p in polys) == [(225.0, 300.0, 300.0, 375.0),
+                                               (300.0, 225.0, 375.0, 300.0)]
+
+
+def test_nested_subpaths_are_even_odd():
+    path = parse_path("M 0 0 L 10 0 L 10 10 L 0 10 Z M 2 2 L 8 2 L 8 8 L 2 8 Z")
+    (poly,) = jc._path_to_polygons(path)
+
+    assert poly.area == pytest.approx(64.0)
+    assert len(poly.interiors) == 1
+
@@ -0,0 +1,89 @@
+"""
+Odd-vertex pairing and chord construction in julehjerte_cuts_chords.
+
+Run with:
+    python -m pytest algorithm/test_julehjerte_cuts_chords.py
+"""
+
+import os
+import pathlib
+
+import numpy as np
+import pytest
+import shapely
+
+import julehjerte_cuts_chords as jc
+
+HEARTS = os.path.join(os.path.dirname(__file__), "..", "static", "hearts")
+
+
+def _check_pairing(pairs: np.ndarray, n: int) -> None:
+    assert pairs.shape == (n // 2, 2)
+    assert len(np.unique(pairs)) == 2 * (n // 2)
+
+
+@pytest.mark.parametrize("n", [jc._MATCHING_MAX_POINTS, jc._MATCHING_MAX_POINTS + 2])
+def test_match_pairs_near_cap(n):
+    pts = np.random.default_rng(0).random((n, 2)) * 25.0
+    _check_pairing(jc._match_pairs(pts), n)
+
+
+@pytest.mark.parametrize("n", [2, 5, 60, jc._MATCHING_MAX_POINTS])
+def test_matching_candidates_are_bounded(n):
+    # Blossom matching is cubic in the edge count, so the candidate graph
+    # must stay linear in the number of points (the complete graph took
+    # ~30 s near the cap).
+    pts = np.random.default_rng(0).random((n, 2)) * 25.0
+    ii, jj, w = jc._matching_candidates(pts)
+
+    edges = {(min(a, b), max(a, b)) for a, b in zip(ii.tolist(), jj.tolist())}
+    assert len(edges) <= jc._MATCHING_NEIGHBOURS * n
+    assert all(a != b for a, b in edges)
+    assert np.allclose(w, np.hypot(*(pts[ii] - pts[jj]).T))
+
+
+def test_match_pairs_not_longer_than_greedy():
+    pts = np.random.default_rng(1).random((60, 2)) * 25.0
+
+    def total(pairs):
+        return np.hypot(*(pts[pairs[:, 0]] - pts[pairs[:, 1]]).T).sum()
+
+    pairs = jc._match_pairs(pts)
+    _check_pairing(pairs, len(pts))
+    assert total(pairs) <= total(jc._greedy_pairs(pts)) + 1e-9
+
+
+def test_chords_match_eroded_face_predicate():
+    # h3h5.svg has sliver and zero-area faces; chords are kept exactly when
+    # their midpoint is inside the face eroded by 1e-6 (or inside the face
+    # itself when erosion leaves nothing).
+    mesh = jc.build_mesh_from_svg(os.path.join(HEARTS, "h3h5.svg"))
+
+    assert len(mesh.edge_v1) == 309
+    assert int((mesh.edge_delta == 0).sum()) == 283
+    assert len(mesh.crossing_pairs) == 11069
+
+
+@pytest.mark.parametrize("m", [8, 64])  # brute-force and STRtree paths
+def test_crossing_pairs_match_shapely_at_t_junctions(m):
+    # Half the segments start on another segment (a T-junction up to
+    # rounding); those must follow Shapely's crosses(), not the raw signs.
+    rng = np.random.default_rng(2)
+    p1 = rng.random((m, 2)) * 40.0
+    p2 = rng.random((m, 2)) * 40.0
+    t = rng.random(m // 2)[:, None]
+    p1[m // 2:] = p1[:m // 2] + t * (p2[:m // 2] - p1[:m // 2])
+    ends = np.arange(2 * m).reshape(m, 2)
+
+    segs = shapely.linestrings(np.stack([p1, p2], axis=1))
+    ii, jj = np.nonzero(np.triu(shapely.crosses(segs[:, None], segs[None, :]), k=1))
+    assert jc._crossing_segment_pairs(p1, p2, ends) == list(zip(ii.tolist(), jj.tolist()))
+
+
+def test_as_tree_parses_paths():
+    svg = os.path.join(HEARTS, "h3h5.svg")
+    tree = jc.ET.parse(svg)
+
+    assert jc._as_tree(tree) is tree
+    for arg in (svg, pathlib.Path(svg)):
+        assert isinstance(jc._as_tree(arg), jc.ET.ElementTree)
@@ -1,11 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-for x in np.linspace(-np.pi, np.pi, 8):
-    ys = np.linspace(-np.pi, np.pi, 100)
-    xs = np.full(ys.shape, x)
-    plt.plot(np.cos(ys), np.cos(xs))
-for y in np.linspace(-np.pi, np.pi, 8):
-    xs = np.linspace(-np.pi, np.pi, 100)
-    ys = np.full(xs.shape, y)
-    plt.plot(np.cos(ys), np.cos(xs))
+# Each column of a 2D array is drawn as its own line.
+t, c = np.meshgrid(np.linspace(-np.pi, np.pi, 100), np.linspace(-np.pi, np.pi, 8))
+plt.plot(np.cos(t).T, np.cos(c).T)
+plt.plot(np.cos(c).T, np.cos(t).T)
 plt.show()